@@ -6,47 +6,372 @@
 # timestamp naming convention and allows navigation through file history.
 
 import argparse
-import re
+import contextlib
+import difflib
+import errno
+import functools
+import io
+import operator
+import os
+import select
+import shutil
+import signal
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+# Terminal control modules differ by platform; import them once up front
+try:
+    import termios
+    import tty
+    _POSIX = True
+except ImportError:
+    _POSIX = False
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Pairs smaller than this (combined) are diffed in-process with difflib;
+# larger ones are diffed by git, whose diff implementation scales better
+_SMALL_FILE_THRESHOLD = 128 * 1024
+
+# Comparisons ahead of the current one whose diffs are prepared in the
+# background (the previous one is kept ready as well)
+_PREFETCH_PAIRS = 2
+
+_GIT_DIFF_COMMAND = ["git", "diff", "--no-index", "--no-ext-diff", "--color=never", "--"]
+
+# Escape sequence that clears the screen and homes the cursor
+_CLEAR_SCREEN = b'\x1b[2J\x1b[H'
+
+# Prompt template for each position in the history,
+# keyed by (at first comparison, at last comparison)
+_PROMPTS: dict[tuple[bool, bool], str] = {
+    # Only one comparison available
+    (True, True): "\nPress 'q' to quit {pos}: ",
+    # First comparison - no previous option
+    (True, False): "\nPress 'n' for next, 'G' for end {pos}, or 'q' to quit: ",
+    # Last comparison - no next option
+    (False, True): "\nPress 'p' for previous, 'g' for beginning {pos}, or 'q' to quit: ",
+    # Middle comparisons - all options available
+    (False, False): "\nPress 'n' for next, 'p' for previous, 'g' for beginning, 'G' for end {pos}, or 'q' to quit: ",
+}
+
+# Error shown for an unusable key, keyed like _PROMPTS
+_INVALID_MESSAGES: dict[tuple[bool, bool], str] = {
+    (True, True): "Invalid input. Use 'q' to quit.",
+    (True, False): "Invalid input. Use 'n' for next, 'G' for end, or 'q' to quit.",
+    (False, True): "Invalid input. Use 'p' for previous, 'g' for beginning, or 'q' to quit.",
+    (False, False): "Invalid input. Use 'n' for next, 'p' for previous, 'g' for beginning, 'G' for end, or 'q' to quit.",
+}
+
+
+def _on_invalid(current_index: int, max_index: int, count: int) -> tuple[Optional[int], bool, str]:
+    """Stay on the current comparison and explain which keys are usable."""
+    return current_index, False, _INVALID_MESSAGES[(current_index == 0, current_index == max_index)]
+
+
+def _on_quit(current_index: int, max_index: int, count: int) -> tuple[Optional[int], bool, str]:
+    """End the session."""
+    return None, False, "Exiting..."
+
+
+def _on_next(current_index: int, max_index: int, count: int) -> tuple[Optional[int], bool, str]:
+    """Move toward older versions; a held or repeated key moves several at once."""
+    if current_index >= max_index:
+        return _on_invalid(current_index, max_index, count)
+    return min(current_index + count, max_index), True, ""
+
+
+def _on_previous(current_index: int, max_index: int, count: int) -> tuple[Optional[int], bool, str]:
+    """Move toward newer versions; a held or repeated key moves several at once."""
+    if current_index <= 0:
+        return _on_invalid(current_index, max_index, count)
+    return max(current_index - count, 0), True, ""
+
+
+def _on_beginning(current_index: int, max_index: int, count: int) -> tuple[Optional[int], bool, str]:
+    """Jump to the first comparison."""
+    if current_index == 0:
+        return current_index, False, "Already at the beginning."
+    return 0, True, "Jumped to beginning"
+
+
+def _on_end(current_index: int, max_index: int, count: int) -> tuple[Optional[int], bool, str]:
+    """Jump to the last comparison."""
+    if current_index == max_index:
+        return current_index, False, "Already at the end."
+    return max_index, True, "Jumped to end"
+
+
+# Each handler takes (current_index, max_index, repeat count) and returns
+# (new index or None to quit, whether to run delta again, message to print)
+_KEY_HANDLERS = {
+    'n': _on_next,
+    'p': _on_previous,
+    'g': _on_beginning,
+    'G': _on_end,
+    'q': _on_quit,
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _read_file(path_str: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Read (and cache) a file's contents.
+
+    The modification time and size are part of the cache key so that an
+    edited file is read again.
+
+    Args:
+        path_str: File path
+        mtime_ns: File modification time in nanoseconds
+        size: File size in bytes
+
+    Returns:
+        File contents
+    """
+    return Path(path_str).read_bytes()
+
+
+def _split_lines(data: bytes) -> list[str]:
+    """
+    Split file contents into lines the way diff does.
+
+    Only '\n' ends a line; str.splitlines() would also break on form feeds,
+    lone carriage returns and other Unicode line separators.
+
+    Args:
+        data: Raw file contents
+
+    Returns:
+        Lines with their line endings kept
+    """
+    # surrogateescape lets undecodable bytes round-trip unchanged
+    text = data.decode('utf-8', errors='surrogateescape')
+    return io.StringIO(text, newline='\n').readlines()
+
+
+@functools.lru_cache(maxsize=256)
+def _diff_for_keys(key1: tuple[str, int, int], key2: tuple[str, int, int]) -> bytes:
+    """
+    Build (and cache) a unified diff between two files identified by stat keys.
+
+    Args:
+        key1: (path, mtime_ns, size) of the first file
+        key2: (path, mtime_ns, size) of the second file
+
+    Returns:
+        Unified diff as bytes (empty if the files are identical)
+    """
+    lines1 = _split_lines(_read_file(*key1))
+    lines2 = _split_lines(_read_file(*key2))
+
+    diff_lines = []
+    for line in difflib.unified_diff(lines1, lines2, key1[0], key2[0]):
+        if not line.endswith('\n'):
+            line += '\n\\ No newline at end of file\n'
+        diff_lines.append(line)
+    return ''.join(diff_lines).encode('utf-8', errors='surrogateescape')
+
+
+def _file_key(path: Path) -> tuple[str, int, int]:
+    """
+    Build the cache key identifying a file's current contents.
+
+    Args:
+        path: File path
+
+    Returns:
+        Tuple of (path, mtime_ns, size)
+    """
+    st = path.stat()
+    return str(path), st.st_mtime_ns, st.st_size
+
+
+def _compute_diff(key1: tuple[str, int, int], key2: tuple[str, int, int]) -> Optional[bytes]:
+    """
+    Build a unified diff between two small files for delta to render.
+
+    Args:
+        key1: (path, mtime_ns, size) of the first file
+        key2: (path, mtime_ns, size) of the second file
+
+    Returns:
+        Unified diff as bytes (empty if the files are identical), or None if
+        the files are too large to diff in-process
+    """
+    if key1[2] + key2[2] >= _SMALL_FILE_THRESHOLD:
+        return None
+    return _diff_for_keys(key1, key2)
+
+
+def _start_git_diff(file1: Path, file2: Path) -> Optional[subprocess.Popen]:
+    """
+    Start `git diff --no-index` between two files with its output on a pipe.
+
+    Args:
+        file1: First file path
+        file2: Second file path
+
+    Returns:
+        The running git process, or None if git is not installed
+    """
+    try:
+        return subprocess.Popen(
+            _GIT_DIFF_COMMAND + [str(file1), str(file2)],
+            stdout=subprocess.PIPE
+        )
+    except FileNotFoundError:
+        return None
+
+
+def _start_spool_git_diff(path1: str, path2: str, spool_path: str) -> Optional[subprocess.Popen]:
+    """
+    Start `git diff --no-index` writing the diff of two files to a spool file.
+
+    Args:
+        path1: First file path
+        path2: Second file path
+        spool_path: File to write the diff to
+
+    Returns:
+        The running git process, or None if git is not installed
+    """
+    with open(spool_path, 'wb') as spool:
+        try:
+            return subprocess.Popen(
+                _GIT_DIFF_COMMAND + [path1, path2],
+                stdout=spool,
+                stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            return None
+
+
+def _ignore_sigint() -> None:
+    """
+    Ignore Ctrl-C in diff worker processes.
+
+    Workers share the terminal's process group, so Ctrl-C reaches them too;
+    the main process handles it and shuts the pool down.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _send_file(path: str, fd: int) -> None:
+    """
+    Copy a file's contents to a file descriptor, in-kernel where possible.
+
+    Args:
+        path: File to copy from
+        fd: Descriptor to write to (e.g. a pipe to delta)
+    """
+    with open(path, 'rb') as src:
+        if hasattr(os, 'sendfile'):
+            size = os.fstat(src.fileno()).st_size
+            offset = 0
+            try:
+                while offset < size:
+                    sent = os.sendfile(fd, src.fileno(), offset, size - offset)
+                    if not sent:
+                        break
+                    offset += sent
+                return
+            except OSError as e:
+                if offset or e.errno not in (errno.EINVAL, errno.ENOTSOCK, errno.ENOSYS):
+                    raise
+
+        # sendfile() is unavailable or cannot write to this descriptor (e.g. a
+        # pipe on macOS), so copy through userspace instead
+        with open(fd, 'wb', closefd=False) as dest:
+            shutil.copyfileobj(src, dest)
 
 
 def clear_screen() -> None:
     """
     Clear the terminal screen (cross-platform).
     """
-    try:
-        # Try to use termios (Unix/Linux/macOS)
-        import termios
-        import tty
-
-        # Send clear screen escape sequence
-        sys.stdout.write('\033[2J\033[H')
-        sys.stdout.flush()
-    except ImportError:
+    if _POSIX:
+        # Write the escape sequence straight to the descriptor, skipping the
+        # text layer's encoding and buffering
+        os.write(sys.stdout.fileno(), _CLEAR_SCREEN)
+    elif msvcrt is not None:
         # Fallback for Windows
-        try:
-            import msvcrt
-            import os
-            os.system('cls')
-        except ImportError:
-            # Ultimate fallback - print newlines
-            print('\n' * 50)
+        os.system('cls')
+    else:
+        # Ultimate fallback - print newlines
+        print('\n' * 50)
+
 
+class _RawTTY:
+    """
+    Caches the terminal's cooked and raw termios settings for a session.
 
-def get_single_keypress() -> str:
+    Raw mode is only switched on while a key is being read, since delta and
+    its pager need the terminal in its normal (cooked) state.
+    """
+
+    def __init__(self):
+        self.fd: Optional[int] = None
+        self.cooked_settings: Optional[list] = None
+        self.raw_settings: Optional[list] = None
+        # Key read while draining a burst that belongs to the next keypress
+        self.pending_key: Optional[str] = None
+
+    def __enter__(self) -> "_RawTTY":
+        if not _POSIX or not sys.stdin.isatty():
+            return self
+
+        self.fd = sys.stdin.fileno()
+        self.cooked_settings = termios.tcgetattr(self.fd)
+        self.raw_settings = termios.tcgetattr(self.fd)
+        tty.cfmakeraw(self.raw_settings)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.cooked_settings is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.cooked_settings)
+
+
+def get_single_keypress(terminal: Optional[_RawTTY] = None) -> tuple[str, int]:
     """
     Get a single keypress without requiring Enter (cross-platform).
 
+    When a terminal session is given, any further presses of the same key that
+    are already waiting (held key, paste) are collapsed into one repeat count.
+
+    Args:
+        terminal: Optional session with cached termios settings to reuse
+
     Returns:
-        The pressed key as a string
+        Tuple of (pressed key, number of times it was pressed)
     """
-    try:
-        # Try to use termios (Unix/Linux/macOS)
-        import termios
-        import tty
+    if _POSIX:
+        if terminal is not None and terminal.raw_settings is not None:
+            termios.tcsetattr(terminal.fd, termios.TCSADRAIN, terminal.raw_settings)
+            try:
+                if terminal.pending_key is not None:
+                    key = terminal.pending_key
+                    terminal.pending_key = None
+                else:
+                    key = os.read(terminal.fd, 1).decode('utf-8', errors='replace')
+
+                count = 1
+                while select.select([terminal.fd], [], [], 0)[0]:
+                    extra = os.read(terminal.fd, 1).decode('utf-8', errors='replace')
+                    if extra != key:
+                        terminal.pending_key = extra
+                        break
+                    count += 1
+            finally:
+                termios.tcsetattr(terminal.fd, termios.TCSADRAIN, terminal.cooked_settings)
+            return key, count
 
         fd = sys.stdin.fileno()
         old_settings = termios.tcgetattr(fd)
@@ -55,17 +380,16 @@ def get_single_keypress() -> str:
             key = sys.stdin.read(1)
         finally:
             termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-        return key
-    except ImportError:
+        return key, 1
+
+    if msvcrt is not None:
         # Fallback for Windows
-        try:
-            import msvcrt
-            key = msvcrt.getch().decode('utf-8')
-            return key
-        except ImportError:
-            # Ultimate fallback - requires Enter
-            print("(Press Enter after your choice)")
-            return input()
+        key = msvcrt.getch().decode('utf-8')
+        return key, 1
+
+    # Ultimate fallback - requires Enter
+    print("(Press Enter after your choice)")
+    return input(), 1
 
 
 class DeltaVersionComparer:
@@ -81,6 +405,19 @@ class DeltaVersionComparer:
         """
         self.current_dir = current_dir
         self.clear_screen_enabled = clear_screen_enabled
+        # (directory, base filename) -> (directory mtime in ns, versioned files)
+        self._version_cache: dict[tuple[str, str], tuple[int, list[Path]]] = {}
+        # Stat keys of the adjacent pairs being compared this session, or None
+        # if they could not be read up front
+        self._pair_keys: Optional[list[tuple[tuple[str, int, int], tuple[str, int, int]]]] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._spool_dir: Optional[str] = None
+        # Background diffs for the current session, keyed by the (path,
+        # mtime_ns, size) of both files at submission time: in-process diffs
+        # of small pairs, and git processes spooling large ones to a file
+        self._diff_futures: dict[tuple[tuple[str, int, int], tuple[str, int, int]], Future] = {}
+        self._spool_processes: dict[tuple[tuple[str, int, int], tuple[str, int, int]],
+                                    tuple[subprocess.Popen, str]] = {}
 
     def _find_versioned_files(self, base_filename: str) -> list[Path]:
         """
@@ -92,32 +429,147 @@ class DeltaVersionComparer:
         Returns:
             List of versioned file paths sorted by timestamp (newest first)
         """
+        # Reuse the previous scan while the directory is unchanged
+        cache_key = (str(self.current_dir), base_filename)
+        dir_mtime = os.stat(self.current_dir).st_mtime_ns
+        cached = self._version_cache.get(cache_key)
+        if cached is not None and cached[0] == dir_mtime:
+            return cached[1]
+
         base_path = Path(base_filename)
         stem = base_path.stem
         suffix = base_path.suffix
 
         # Pattern: filename-YYYYmmdd.HHMMSS.ext
-        pattern = re.compile(
-            rf"^{re.escape(stem)}-(\d{{8}})\.(\d{{6}}){re.escape(suffix)}$"
-        )
+        prefix = f"{stem}-"
+        plen = len(prefix)
+        # The timestamp (YYYYmmdd.HHMMSS) is always 15 characters wide
+        name_len = plen + 15 + len(suffix)
 
+        directory = str(self.current_dir)
         versioned_files = []
-        for file_path in self.current_dir.iterdir():
-            if file_path.is_file():
-                match = pattern.match(file_path.name)
-                if match:
-                    date_part, time_part = match.groups()
-                    timestamp = f"{date_part}.{time_part}"
-                    versioned_files.append((timestamp, file_path))
+        # listdir() returns plain strings; only the few names that match the
+        # pattern are stat()ed to make sure they are regular files
+        for name in os.listdir(directory):
+            if not (len(name) == name_len and name.startswith(prefix)
+                    and name.endswith(suffix)):
+                continue
+            timestamp = name[plen:plen + 15]
+            # isascii() is a constant-time flag check on str and keeps isdigit()
+            # from accepting non-ASCII digits such as '²' or Arabic-Indic ones
+            if not (timestamp[8] == '.' and timestamp.isascii()
+                    and timestamp[:8].isdigit() and timestamp[9:].isdigit()):
+                continue
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                versioned_files.append((timestamp, path))
 
         # Sort by timestamp (newest first)
-        versioned_files.sort(key=lambda x: x[0], reverse=True)
-        return [file_path for _, file_path in versioned_files]
+        versioned_files.sort(key=operator.itemgetter(0), reverse=True)
+        result = [Path(path) for _, path in versioned_files]
+        self._version_cache[cache_key] = (dir_mtime, result)
+        return result
+
+    @contextlib.contextmanager
+    def _precompute_diffs(self, files: list[Path]) -> Iterator[None]:
+        """
+        Set up background diffing for a session; see _prefetch_diffs().
+
+        On exit, pending small diffs are cancelled, git processes still
+        spooling large ones are terminated and the spool files are removed.
+
+        Args:
+            files: Files being compared, newest first
+        """
+        try:
+            keys = [_file_key(file_path) for file_path in files]
+        except OSError:
+            # A file vanished; diffs will be computed (and errors reported) on demand
+            yield
+            return
+
+        self._pair_keys = list(zip(keys, keys[1:]))
+        try:
+            self._executor = ProcessPoolExecutor(
+                max_workers=min(len(self._pair_keys), _PREFETCH_PAIRS + 1, os.cpu_count() or 1),
+                initializer=_ignore_sigint
+            )
+        except (OSError, ImportError, NotImplementedError):
+            # No working multiprocessing (e.g. no sem_open); small pairs are
+            # diffed on demand
+            self._executor = None
+
+        try:
+            yield
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            for process, _ in self._spool_processes.values():
+                if process.poll() is None:
+                    process.terminate()
+                process.wait()
+            if self._spool_dir is not None:
+                shutil.rmtree(self._spool_dir, ignore_errors=True)
+            self._pair_keys = None
+            self._executor = None
+            self._spool_dir = None
+            self._diff_futures = {}
+            self._spool_processes = {}
+
+    def _prefetch_diffs(self, index: int) -> None:
+        """
+        Start computing the diffs of the comparisons around the current one.
+
+        Only the previous comparison and the next _PREFETCH_PAIRS are prepared,
+        so work is not spent on pairs the user may never view. Small pairs are
+        diffed in worker processes and come back as diff bytes. Large pairs are
+        diffed by git straight into spool files, which keeps big diffs out of
+        the result pipe and lets them be sent on to delta without a userspace
+        copy.
+
+        Args:
+            index: Index of the comparison being shown
+        """
+        if self._pair_keys is None:
+            return
+
+        # The current pair is needed right away and is diffed directly
+        for pair_index in (index - 1, *range(index + 1, index + 1 + _PREFETCH_PAIRS)):
+            if not 0 <= pair_index < len(self._pair_keys):
+                continue
+            pair = self._pair_keys[pair_index]
+            if pair in self._diff_futures or pair in self._spool_processes:
+                continue
+
+            key1, key2 = pair
+            if key1[2] + key2[2] < _SMALL_FILE_THRESHOLD:
+                if self._executor is not None:
+                    try:
+                        self._diff_futures[pair] = self._executor.submit(_compute_diff, key1, key2)
+                    except BrokenExecutor:
+                        self._executor = None
+                continue
+
+            if self._spool_dir is None:
+                self._spool_dir = tempfile.mkdtemp(prefix="delta-version-compare-")
+            # A fresh file per process: a stale git diff for the same pair
+            # index (from before a file changed) may still be writing its own
+            fd, spool_path = tempfile.mkstemp(dir=self._spool_dir, suffix=".diff")
+            os.close(fd)
+            process = _start_spool_git_diff(key1[0], key2[0], spool_path)
+            if process is not None:
+                self._spool_processes[pair] = (process, spool_path)
 
     def _run_delta(self, file1: Path, file2: Path) -> bool:
         """
         Run delta command between two files.
 
+        Small files are diffed in-process and piped to delta, which then only
+        has to render the result rather than spawning a diff tool of its own.
+        Larger files are diffed by `git diff --no-index`: a precomputed diff
+        is sent to delta from its spool file, otherwise git streams straight
+        into delta so rendering starts before the diff is complete.
+
         Args:
             file1: First file path
             file2: Second file path
@@ -126,10 +578,44 @@ class DeltaVersionComparer:
             True if delta command succeeded, False otherwise
         """
         try:
-            subprocess.run(
-                ["delta", str(file1), str(file2)],
-                check=True
-            )
+            key1 = _file_key(file1)
+            key2 = _file_key(file2)
+            # Use the background result unless either file changed since
+            future = self._diff_futures.get((key1, key2))
+            spooled = self._spool_processes.get((key1, key2))
+            if spooled is not None:
+                process, diff = spooled
+                process.wait()
+            else:
+                try:
+                    diff = future.result() if future is not None else _compute_diff(key1, key2)
+                except BrokenExecutor:
+                    diff = _compute_diff(key1, key2)
+        except OSError as e:
+            print(f"Error reading files: {e}", file=sys.stderr)
+            return True
+
+        # The diff is now bytes (in-process), a spool file path (precomputed
+        # by git) or None (large pair to be diffed now)
+        spool_path = diff if isinstance(diff, str) else None
+        git_diff = _start_git_diff(file1, file2) if diff is None else None
+
+        if diff is None and git_diff is None:
+            # No git available; let delta diff the files itself
+            command = ["delta", str(file1), str(file2)]
+        else:
+            command = ["delta"]
+
+        try:
+            if spool_path is not None:
+                self._run_delta_from_file(command, spool_path)
+            else:
+                subprocess.run(
+                    command,
+                    stdin=git_diff.stdout if git_diff is not None else None,
+                    input=diff,
+                    check=True
+                )
             return True
         except subprocess.CalledProcessError as e:
             # print(f"Error running delta: {e}", file=sys.stderr)
@@ -137,6 +623,31 @@ class DeltaVersionComparer:
         except FileNotFoundError:
             print("Error: 'delta' command not found. Please install delta from https://github.com/dandavison/delta", file=sys.stderr)
             return False
+        finally:
+            if git_diff is not None:
+                git_diff.stdout.close()
+                git_diff.wait()
+
+    def _run_delta_from_file(self, command: list[str], diff_path: str) -> None:
+        """
+        Run delta with a diff file sent to its stdin.
+
+        Args:
+            command: delta command line
+            diff_path: File containing the diff to render
+
+        Raises:
+            FileNotFoundError: If delta is not installed
+        """
+        delta = subprocess.Popen(command, stdin=subprocess.PIPE)
+        try:
+            _send_file(diff_path, delta.stdin.fileno())
+        except BrokenPipeError:
+            # delta (or its pager) exited before reading the whole diff
+            pass
+        finally:
+            delta.stdin.close()
+            delta.wait()
 
     def _check_current_file_exists(self, filename: str) -> bool:
         """
@@ -184,88 +695,44 @@ class DeltaVersionComparer:
         current_index = 0
         max_index = len(files_to_compare) - 2  # Last valid comparison index
 
-        while True:
-            if current_index > max_index:
-                print("\nReached the end of file history.")
-                break
-
-            file1 = files_to_compare[current_index]
-            file2 = files_to_compare[current_index + 1]
-
-            print(f"Comparing: {file1.name} -> {file2.name}")
-
-            if self.clear_screen_enabled:
-                clear_screen()
-
-            if not self._run_delta(file1, file2):
-                print("Failed to run delta comparison")
-                break
-
-            # Prepare prompt based on current position
-            position_info = f"({current_index + 1}/{max_index + 1})"
-
-            if current_index == 0 and current_index == max_index:
-                # Only one comparison available
-                prompt = f"\nPress 'q' to quit {position_info}: "
-                valid_keys = {'q'}
-            elif current_index == 0:
-                # First comparison - no previous option
-                prompt = f"\nPress 'n' for next, 'G' for end {position_info}, or 'q' to quit: "
-                valid_keys = {'n', 'G', 'q'}
-            elif current_index == max_index:
-                # Last comparison - no next option
-                prompt = f"\nPress 'p' for previous, 'g' for beginning {position_info}, or 'q' to quit: "
-                valid_keys = {'p', 'g', 'q'}
-            else:
-                # Middle comparisons - all options available
-                prompt = f"\nPress 'n' for next, 'p' for previous, 'g' for beginning, 'G' for end {position_info}, or 'q' to quit: "
-                valid_keys = {'n', 'p', 'g', 'G', 'q'}
-
-            print(prompt, end="", flush=True)
-
-            key = get_single_keypress()
-            print(key)  # Echo the key for user feedback
-
-            if key == 'q':
-                print("Exiting...")
-                break
-            elif key == 'n' and current_index < max_index:
-                current_index += 1
-                print()
-            elif key == 'p' and current_index > 0:
-                current_index -= 1
-                print()
-            elif key == 'g':
-                if current_index != 0:
-                    current_index = 0
-                    print("Jumped to beginning")
-                    print()
-                else:
-                    print("Already at the beginning.")
-            elif key == 'G':
-                if current_index != max_index:
-                    current_index = max_index
-                    print("Jumped to end")
+        show_delta = True
+
+        with _RawTTY() as terminal, self._precompute_diffs(files_to_compare):
+            while True:
+                file1 = files_to_compare[current_index]
+                file2 = files_to_compare[current_index + 1]
+
+                if show_delta:
+                    self._prefetch_diffs(current_index)
+
+                    if self.clear_screen_enabled:
+                        clear_screen()
+
+                    if not self._run_delta(file1, file2):
+                        print("Failed to run delta comparison")
+                        break
+
+                # Prepare prompt based on current position
+                position_info = f"({current_index + 1}/{max_index + 1})"
+                prompt = _PROMPTS[(current_index == 0, current_index == max_index)].format(pos=position_info)
+
+                # Emit the header and prompt as a single write to the terminal
+                sys.stdout.write(f"\nComparing: {file1.name} -> {file2.name}{prompt}")
+                sys.stdout.flush()
+
+                key, count = get_single_keypress(terminal)
+                print(key)  # Echo the key for user feedback
+
+                handler = _KEY_HANDLERS.get(key, _on_invalid)
+                new_index, show_delta, message = handler(current_index, max_index, count)
+
+                if message:
+                    print(message)
+                if new_index is None:
+                    break
+                if show_delta:
                     print()
-                else:
-                    print("Already at the end.")
-            else:
-                # Invalid input handling
-                if key not in valid_keys:
-                    if current_index == 0 and current_index == max_index:
-                        print("Invalid input. Use 'q' to quit.")
-                    elif current_index == 0:
-                        print("Invalid input. Use 'n' for next, 'G' for end, or 'q' to quit.")
-                    elif current_index == max_index:
-                        print("Invalid input. Use 'p' for previous, 'g' for beginning, or 'q' to quit.")
-                    else:
-                        print("Invalid input. Use 'n' for next, 'p' for previous, 'g' for beginning, 'G' for end, or 'q' to quit.")
-                else:
-                    # Handle boundary cases
-                    if key == 'n':
-                        print("Cannot go to next from the last comparison.")
-                    elif key == 'p':
-                        print("Cannot go to previous from the first comparison.")
+                current_index = new_index
 
 
 def main() -> None:
@@ -6,11 +6,199 @@
 # and provides options to filter by date or limit the number of versions extracted.
 
 import argparse
+import collections
+import functools
+import itertools
+import os
+import queue
+import re
 import subprocess
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, BinaryIO, Iterable, Iterator, Optional
+
+# Most object requests queued ahead of the replies being read
+_MAX_IN_FLIGHT = 32
+
+# Threads writing extracted versions to disk
+_MAX_WRITE_WORKERS = 8
+
+# Bytes read from a git pipe at a time
+_READ_SIZE = 64 * 1024
+
+# One NUL-separated record of `git log -z --pretty=format:"%H %ci" --raw`: a commit
+# header "<hash> <date>" and/or the raw diff ":<modes> <old blob> <new blob> <status>"
+# that precedes the path records
+_LOG_RECORD_RE = re.compile(rb'(?:([0-9a-f]+) ([^\n]+)\n?)?(?::\d+ \d+ [0-9a-f]+ ([0-9a-f]+) ([A-Z]))?')
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_timestamp(commit_date: str) -> str:
+    """
+    Format commit date to YYYYmmdd.HHMMSS format.
+
+    Args:
+        commit_date: Git commit date string
+
+    Returns:
+        Formatted timestamp string
+    """
+    # git's %ci format is fixed width: "2025-07-22 01:02:03 +0000"
+    timestamp = (f"{commit_date[0:4]}{commit_date[5:7]}{commit_date[8:10]}."
+                 f"{commit_date[11:13]}{commit_date[14:16]}{commit_date[17:19]}")
+    if len(timestamp) == 15 and timestamp[:8].isdigit() and timestamp[9:].isdigit():
+        return timestamp
+
+    # Fallback: use current timestamp if parsing fails
+    return datetime.now().strftime("%Y%m%d.%H%M%S")
+
+
+def _split_records(stream: BinaryIO) -> Iterator[bytes]:
+    """
+    Split a stream into NUL-terminated records as the data arrives.
+
+    Args:
+        stream: Binary stream, such as a process's stdout pipe
+
+    Yields:
+        Each record without its NUL terminator
+    """
+    pending = b''
+    while chunk := stream.read1(_READ_SIZE):
+        records = (pending + chunk).split(b'\0')
+        pending = records.pop()
+        yield from records
+    if pending:
+        yield pending
+
+
+def _emit(content: bytes, output_path: Path) -> None:
+    """
+    Write one extracted version to disk.
+
+    The contents go straight to the file descriptor, without a buffered
+    file object copying them in chunks.
+
+    Args:
+        content: Raw file contents at the commit
+        output_path: Destination path for this version
+    """
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+class _CatFileBatch:
+    """Reads many git objects through a single `git cat-file --batch` process."""
+
+    def __init__(self, process: subprocess.Popen):
+        """
+        Wrap a running `git cat-file --batch` process.
+
+        Args:
+            process: Process started with binary stdin and stdout pipes
+        """
+        self._process = process
+
+    def __enter__(self) -> "_CatFileBatch":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the request pipe and wait for git to exit."""
+        self._process.stdin.close()
+        self._process.wait()
+        self._process.stdout.close()
+
+    def read_many(self, requests: Iterable[tuple[str, Any]]) -> Iterator[tuple[Any, Optional[bytes]]]:
+        """
+        Read many git objects, pipelining the requests ahead of the replies.
+
+        A writer thread feeds object names to git while the caller consumes
+        the replies, so git can look up the next objects while the previous
+        ones are being processed. At most _MAX_IN_FLIGHT requests are
+        outstanding at once, which bounds the memory held in the pipes.
+
+        Args:
+            requests: Pairs of (object name understood by git, caller data)
+
+        Yields:
+            Pairs of (caller data, raw object contents or None if missing)
+
+        Raises:
+            RuntimeError: If git stopped responding
+        """
+        pending: queue.Queue = queue.Queue()
+        slots = threading.Semaphore(_MAX_IN_FLIGHT)
+        stop = threading.Event()
+        done = object()
+        errors = []
+
+        def write_requests() -> None:
+            try:
+                for object_spec, item in requests:
+                    slots.acquire()
+                    if stop.is_set():
+                        break
+                    self._process.stdin.write(f"{object_spec}\n".encode('utf-8'))
+                    self._process.stdin.flush()
+                    pending.put(item)
+            except BrokenPipeError:
+                # git exited; the reader reports it when the reply is missing
+                pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                pending.put(done)
+
+        writer = threading.Thread(target=write_requests, daemon=True)
+        writer.start()
+        try:
+            while (item := pending.get()) is not done:
+                content = self._read_reply()
+                slots.release()
+                yield item, content
+        finally:
+            # Unblock the writer if the caller stopped early
+            stop.set()
+            slots.release()
+            writer.join()
+
+        if errors:
+            raise errors[0]
+
+    def _read_reply(self) -> Optional[bytes]:
+        """
+        Read the reply to one object request.
+
+        Returns:
+            Raw object contents, or None if the object does not exist
+
+        Raises:
+            RuntimeError: If git stopped responding
+        """
+        # Reply: "<sha> <type> <size>\n<contents>\n" or "<object> missing\n"
+        header = self._process.stdout.readline()
+        if not header:
+            raise RuntimeError("Git command failed: git cat-file exited unexpectedly")
+        if header.endswith((b" missing\n", b" ambiguous\n")):
+            return None
+
+        size = int(header.split()[2])
+        content = self._process.stdout.read(size)
+        # A short read or missing trailing newline means git died mid-object
+        if len(content) != size or not self._process.stdout.read(1):
+            raise RuntimeError("Git command failed: git cat-file exited unexpectedly")
+        return content
 
 
 class GitFileExtractor:
@@ -26,21 +214,38 @@ class GitFileExtractor:
         """
         self.repo_path = repo_path
         self.verbose = verbose
+        # Repository location resolved by prepare(), passed to later commands
+        self._git_options: list[str] = []
 
     def _run_git_command(self, command: list[str]) -> str:
         """
-        Execute a git command and return its output.
+        Execute a git command and return its output as text.
 
         Args:
             command: List of command arguments to pass to git
 
         Returns:
-            Command output as string
+            Command output decoded as UTF-8, with surrounding whitespace removed
 
         Raises:
             RuntimeError: If the git command fails
         """
-        full_command = ["git"] + command
+        return self._run_git_bytes(command).decode('utf-8').strip()
+
+    def _run_git_bytes(self, command: list[str]) -> bytes:
+        """
+        Execute a git command and return its raw output.
+
+        Args:
+            command: List of command arguments to pass to git
+
+        Returns:
+            Command output exactly as git wrote it
+
+        Raises:
+            RuntimeError: If the git command fails
+        """
+        full_command = ["git"] + self._git_options + command
 
         if self.verbose:
             print()
@@ -51,94 +256,176 @@ class GitFileExtractor:
                 full_command,
                 cwd=self.repo_path,
                 capture_output=True,
-                text=True,
                 check=True
             )
-            return result.stdout.strip()
+            return result.stdout
         except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Git command failed: {e.stderr.strip()}")
+            raise RuntimeError(f"Git command failed: {e.stderr.decode('utf-8', 'replace').strip()}")
 
-    def _is_git_repository(self) -> bool:
+    def _start_git_process(self, command: list[str], stdin: Optional[int] = subprocess.PIPE,
+                           stderr: Optional[int] = None) -> subprocess.Popen:
         """
-        Check if the current directory is a git repository.
+        Start a long-running git command with a binary stdout pipe.
+
+        Args:
+            command: List of command arguments to pass to git
+            stdin: Where git reads its input from (a binary pipe by default)
+            stderr: Where git writes its errors to (inherited by default)
 
         Returns:
-            True if it's a git repository, False otherwise
+            The running git process
         """
-        try:
-            self._run_git_command(["rev-parse", "--git-dir"])
-            return True
-        except RuntimeError:
-            return False
+        full_command = ["git"] + self._git_options + command
 
-    def _get_file_commits(self, filepath: str, after_date: Optional[str] = None) -> list[tuple[str, str]]:
-        """
-        Get list of commits that modified the specified file.
+        if self.verbose:
+            print()
+            print(f"Running: {' '.join(full_command)}")
 
-        Args:
-            filepath: Path to the file in the repository
-            after_date: Optional date filter in ISO format (YYYY-MM-DD)
+        return subprocess.Popen(
+            full_command,
+            cwd=self.repo_path,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=stderr
+        )
 
-        Returns:
-            List of tuples containing (commit_hash, commit_date)
+    def prepare(self, write_commit_graph: bool = True) -> None:
         """
-        command = ["log", "--pretty=format:%H|%ci"]
+        Optionally refresh the commit-graph, resolving the repository on the way.
 
-        if after_date:
-            command.append(f"--after={after_date}")
+        Locating the commit-graph needs the repository's directories, so when
+        it is checked the resolved git directory and work tree are also passed
+        to every later git command, sparing them the search of the parent
+        directories. Without it no extra git process is spent on the lookup.
 
-        command.extend(["--follow", filepath])
+        A commit-graph with changed-path Bloom filters is written if it is
+        missing or stale: `git log --follow` on a single path walks the whole
+        history, and with the Bloom filters git can skip commits that did not
+        touch the path. A failure here only costs speed, so it is reported and
+        otherwise ignored.
+
+        Args:
+            write_commit_graph: Whether to write the commit-graph when needed
+        """
+        if not write_commit_graph:
+            return
+
+        try:
+            git_dir, common_dir, work_tree = self._run_git_command(
+                ["rev-parse", "--path-format=absolute", "--git-dir", "--git-common-dir", "--show-toplevel"]
+            ).split('\n')
+        except (RuntimeError, ValueError):
+            # Not a repository (or no work tree); extract_versions reports that properly
+            return
+
+        self._git_options = [f"--git-dir={git_dir}", f"--work-tree={work_tree}"]
+
+        info_dir = Path(common_dir) / "objects" / "info"
+        graph_mtime = max(
+            (path.stat().st_mtime_ns
+             for path in (info_dir / "commit-graph", info_dir / "commit-graphs" / "commit-graph-chain")
+             if path.exists()),
+            default=None
+        )
+        head_mtime = max(
+            (path.stat().st_mtime_ns
+             for path in (Path(git_dir) / "HEAD", Path(git_dir) / "logs" / "HEAD")
+             if path.exists()),
+            default=0
+        )
+        if graph_mtime is not None and graph_mtime >= head_mtime:
+            return
 
         try:
-            output = self._run_git_command(command)
+            # --split only appends a small layer for new commits rather than
+            # rewriting the whole graph each time HEAD moves
+            self._run_git_command(
+                ["commit-graph", "write", "--reachable", "--changed-paths", "--split", "--no-progress"]
+            )
         except RuntimeError as e:
-            if "does not exist" in str(e).lower() or "bad revision" in str(e).lower():
-                raise FileNotFoundError(f"File '{filepath}' not found in git history")
-            raise
+            print(f"Warning: Could not write commit-graph: {e}")
 
-        if not output:
-            return []
+    def _get_file_commits(self, filepath: str, after_date: Optional[str] = None) -> Iterator[tuple[str, str, Optional[str]]]:
+        """
+        Get the commits that modified the specified file.
 
-        commits = []
-        for line in output.split('\n'):
-            if '|' in line:
-                commit_hash, commit_date = line.split('|', 1)
-                commits.append((commit_hash.strip(), commit_date.strip()))
+        The blob SHA of the file at each commit comes from the same `git log`
+        call (via --raw), so its contents can be read without another lookup.
+        The log is parsed as git writes it, so memory use does not grow with
+        the length of the history.
 
-        return commits
+        Args:
+            filepath: Path to the file in the repository
+            after_date: Optional date filter in ISO format (YYYY-MM-DD)
 
-    def _format_timestamp(self, commit_date: str) -> str:
+        Yields:
+            Tuples containing (commit_hash, commit_date, blob_sha), where
+            blob_sha is None if git reported no file change for the commit
+
+        Raises:
+            FileNotFoundError: If the file is not in the git history
+            RuntimeError: If the git command fails
         """
-        Format commit date to YYYYmmdd.HHMMSS format.
+        command = ["log", "-z", "--no-abbrev", "--pretty=format:%H %ci", "--raw"]
 
-        Args:
-            commit_date: Git commit date string
+        if after_date:
+            command.append(f"--after={after_date}")
 
-        Returns:
-            Formatted timestamp string
-        """
-        # Parse git date format: "2025-07-22 01:02:03 +0000"
+        command.extend(["--follow", filepath])
+
+        process = self._start_git_process(command, stdin=subprocess.DEVNULL, stderr=subprocess.PIPE)
         try:
-            # Remove timezone info for parsing, we'll keep original timezone semantics
-            date_part = commit_date.rsplit(' ', 1)[0]
-            dt = datetime.strptime(date_part, "%Y-%m-%d %H:%M:%S")
-            return dt.strftime("%Y%m%d.%H%M%S")
-        except ValueError:
-            # Fallback: use current timestamp if parsing fails
-            return datetime.now().strftime("%Y%m%d.%H%M%S")
-
-    def _get_file_content_at_commit(self, filepath: str, commit_hash: str) -> str:
+            # Each commit is a "<hash> <date>" header, then for every changed file
+            # a raw diff like ":100644 100644 <old blob> <new blob> M" followed by
+            # one path record (two for renames and copies). Paths are never
+            # parsed, so any bytes in them are safe. A commit is only complete
+            # once the next one starts.
+            commit = None
+            paths_to_skip = 0
+            for record in _split_records(process.stdout):
+                if paths_to_skip:
+                    paths_to_skip -= 1
+                    continue
+
+                commit_hash, commit_date, blob_sha, status = _LOG_RECORD_RE.match(record).groups()
+                if commit_hash is not None:
+                    if commit and self._is_present(commit[2]):
+                        yield tuple(commit)
+                    commit = [commit_hash.decode('ascii'), commit_date.decode('ascii').strip(), None]
+                if blob_sha is not None:
+                    if commit and commit[2] is None:
+                        commit[2] = blob_sha.decode('ascii')
+                    paths_to_skip = 2 if status in b'RC' else 1
+
+            stderr = process.stderr.read().decode('utf-8', 'replace').strip()
+            if process.wait() != 0:
+                error = stderr.lower()
+                if "not a git repository" in error:
+                    raise RuntimeError("Current directory is not a git repository")
+                if "does not exist" in error or "bad revision" in error:
+                    raise FileNotFoundError(f"File '{filepath}' not found in git history")
+                raise RuntimeError(f"Git command failed: {stderr}")
+
+            if commit and self._is_present(commit[2]):
+                yield tuple(commit)
+        finally:
+            # Closing the pipe stops git early if the caller did not read everything
+            process.stdout.close()
+            process.stderr.close()
+            process.wait()
+
+    @staticmethod
+    def _is_present(blob_sha: Optional[str]) -> bool:
         """
-        Get file content at a specific commit.
+        Check whether a commit's blob SHA refers to actual file contents.
 
         Args:
-            filepath: Path to the file in the repository
-            commit_hash: Git commit hash
+            blob_sha: Blob SHA from the raw diff, or None if there was none
 
         Returns:
-            File content as string
+            False if the file was deleted in that commit (an all-zero blob)
         """
-        return self._run_git_command(["show", f"{commit_hash}:{filepath}"])
+        return blob_sha is None or bool(blob_sha.strip('0'))
 
     def _generate_output_filename(self, filepath: str, timestamp: str) -> Path:
         """
@@ -171,46 +458,85 @@ class GitFileExtractor:
         Returns:
             Number of versions extracted
         """
-        if not self._is_git_repository():
-            raise RuntimeError("Current directory is not a git repository")
-
         commits = self._get_file_commits(filepath, after_date)
 
-        if not commits:
-            print(f"No commits found for file: {filepath}")
-            return 0
-
         # Limit number of versions if specified
         if max_versions:
-            commits = commits[:max_versions]
-
-        extracted_count = 0
-        previous_content = None
+            commits = itertools.islice(commits, max_versions)
 
-        for commit_hash, commit_date in commits:
-            try:
-                content = self._get_file_content_at_commit(filepath, commit_hash)
-
-                # Skip if content is identical to previous version (metadata-only changes)
-                if content == previous_content:
+        # Peek so an empty history is reported before any other work starts
+        first_commit = next(commits, None)
+        if first_commit is None:
+            print(f"No commits found for file: {filepath}")
+            return 0
+        commits = itertools.chain([first_commit], commits)
+
+        def object_requests() -> Iterator[tuple[str, tuple[str, str, str]]]:
+            previous_blob_sha = None
+            for commit_hash, commit_date, blob_sha in commits:
+                # Same blob as the previous version (metadata-only change or
+                # rename); skip it without fetching any content
+                if blob_sha is not None and blob_sha == previous_blob_sha:
                     continue
+                previous_blob_sha = blob_sha
 
-                timestamp = self._format_timestamp(commit_date)
-                output_path = self._generate_output_filename(filepath, timestamp)
-
-                # Create directory if it doesn't exist
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-
-                # Write file content
-                output_path.write_text(content, encoding='utf-8')
+                # Read the blob directly; only fall back to a path lookup when
+                # the log had no file change for the commit (e.g. merges)
+                object_spec = blob_sha or f"{commit_hash}:{filepath}"
+                yield object_spec, (commit_hash, commit_date, object_spec)
 
+        previous_content = None
+        extracted_count = 0
+        writes: collections.deque[tuple[Future, Path, str]] = collections.deque()
+        latest_writes: dict[Path, Future] = {}
+
+        def report_writes(wait: bool) -> None:
+            # Report in commit order rather than completion order, as soon as
+            # the oldest outstanding write has finished
+            nonlocal extracted_count
+            while writes and (wait or writes[0][0].done()):
+                future, output_path, commit_hash = writes.popleft()
+                future.result()
                 print(f"Extracted: {output_path} (commit: {commit_hash[:8]})")
                 extracted_count += 1
-                previous_content = content
 
-            except RuntimeError as e:
-                print(f"Warning: Could not extract version at commit {commit_hash[:8]}: {e}")
-                continue
+        # One cat-file process serves every commit instead of a `git show` each,
+        # while a thread pool writes earlier versions out in the background
+        with ThreadPoolExecutor(max_workers=_MAX_WRITE_WORKERS) as pool, \
+                _CatFileBatch(self._start_git_process(["cat-file", "--batch"])) as cat_file:
+            for (commit_hash, commit_date, object_spec), content in cat_file.read_many(object_requests()):
+                try:
+                    if content is None:
+                        raise RuntimeError(f"Git command failed: {object_spec} missing")
+
+                    # Commits without a blob SHA can still repeat the previous content
+                    if content == previous_content:
+                        continue
+
+                    timestamp = _format_timestamp(commit_date)
+                    output_path = self._generate_output_filename(filepath, timestamp)
+
+                    # Create directory if it doesn't exist
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+                    # Commits made within the same second map to the same file;
+                    # finish the earlier write first so the last version wins
+                    earlier_write = latest_writes.get(output_path)
+                    if earlier_write is not None:
+                        earlier_write.result()
+
+                    future = pool.submit(_emit, content, output_path)
+                    latest_writes[output_path] = future
+                    writes.append((future, output_path, commit_hash))
+                    previous_content = content
+
+                except RuntimeError as e:
+                    print(f"Warning: Could not extract version at commit {commit_hash[:8]}: {e}")
+                    continue
+
+                report_writes(wait=False)
+
+            report_writes(wait=True)
 
         return extracted_count
 
@@ -232,6 +558,12 @@ def main() -> None:
         help="Show git commands being executed"
     )
 
+    parser.add_argument(
+        "--no-commit-graph",
+        action="store_true",
+        help="Do not write a commit-graph to speed up the history walk"
+    )
+
     # Mutually exclusive group for filtering options
     filter_group = parser.add_mutually_exclusive_group()
     filter_group.add_argument(
@@ -248,6 +580,7 @@ def main() -> None:
 
     try:
         extractor = GitFileExtractor(verbose=args.verbose)
+        extractor.prepare(write_commit_graph=not args.no_commit_graph)
         count = extractor.extract_versions(
             args.filepath,
             after_date=args.after_date,
@@ -2,36 +2,34 @@
 
 # Source code space cleaner utility
 # Removes extraneous spaces from source files while preserving proper indentation.
-# Moves the original file to /tmp and saves a cleaned version in place.
+# Copies the original file to /tmp and atomically replaces it with a cleaned version.
 
 import argparse
+import mmap
+import os
+import re
 import shutil
+import tempfile
 from pathlib import Path
 
 
-def clean_spaces_from_lines(lines: list[str]) -> list[str]:
-    """
-    Remove trailing whitespace from all lines and convert space-only lines to empty lines.
-
-    Args:
-        lines: List of strings representing file lines
-
-    Returns:
-        List of cleaned lines with trailing whitespace removed
-    """
-    cleaned_lines = []
-
-    for line in lines:
-        # Remove trailing whitespace (including spaces and tabs)
-        cleaned_line = line.rstrip()
-        cleaned_lines.append(cleaned_line)
+# Spaces and tabs at the end of a line, before an LF or CRLF line ending or at end of file.
+# The lookbehind anchors each attempt at the start of a run, so a long run that
+# is not at a line end is scanned once instead of once per position.
+_TRAIL_RE = re.compile(rb'(?<![ \t])[ \t]+(?=\r?\n|\Z)')
 
-    return cleaned_lines
+# Files larger than this are scanned through a memory map instead of being read in
+_MMAP_THRESHOLD = 1 << 20
 
 
 def backup_file_to_tmp(file_path: Path) -> Path:
     """
-    Move the original file to /tmp directory as a backup.
+    Copy the original file to /tmp directory as a backup.
+
+    When /tmp is on the same filesystem the backup is a hard link to the
+    original, which costs one system call instead of copying the contents;
+    the cleaned file is later written to a new inode, so the link keeps the
+    original contents.
 
     Args:
         file_path: Path object pointing to the file to backup
@@ -41,27 +39,74 @@ def backup_file_to_tmp(file_path: Path) -> Path:
 
     Raises:
         FileNotFoundError: If the source file doesn't exist
-        PermissionError: If unable to move file to /tmp
+        PermissionError: If unable to copy file to /tmp
     """
-    backup_path = Path("/tmp") / file_path.name
-
-    # If backup already exists, add a number suffix
-    counter = 1
-    original_backup_path = backup_path
-    while backup_path.exists():
-        stem = original_backup_path.stem
-        suffix = original_backup_path.suffix
-        backup_path = Path("/tmp") / f"{stem}_{counter}{suffix}"
-        counter += 1
-
-    shutil.move(str(file_path), str(backup_path))
+    # Reserve a unique name atomically rather than probing for a free one
+    fd, backup_name = tempfile.mkstemp(prefix=f"{file_path.stem}_", suffix=file_path.suffix, dir="/tmp")
+    os.close(fd)
+    backup_path = Path(backup_name)
+
+    try:
+        link_path = Path(f"{backup_name}.link")
+        try:
+            os.link(file_path, link_path)
+        except OSError:
+            # Cross-filesystem /tmp, hard links not permitted or supported, or
+            # the side name is taken; copy the contents instead
+            shutil.copy2(file_path, backup_path)
+        else:
+            try:
+                os.replace(link_path, backup_path)
+            except BaseException:
+                link_path.unlink(missing_ok=True)
+                raise
+    except BaseException:
+        # Don't leave the reserved (empty) backup file behind
+        backup_path.unlink(missing_ok=True)
+        raise
     return backup_path
 
 
+def write_file_atomically(file_path: Path, content: bytes) -> None:
+    """
+    Replace a file's contents so it is never left missing or half-written.
+
+    The content goes to a sibling temporary file with the same permissions,
+    which is then renamed over the original.
+
+    Args:
+        file_path: Path object pointing to the file to replace
+        content: New file contents
+
+    Raises:
+        PermissionError: If unable to write next to the file
+    """
+    mode = file_path.stat().st_mode & 0o7777
+
+    # A fresh unique name, so no existing file next to the original is touched
+    fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=file_path.name + '.', suffix='.tmp')
+    tmp_path = Path(tmp_name)
+    try:
+        try:
+            os.fchmod(fd, mode)  # mkstemp creates the file as 0600
+            view = memoryview(content)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
 def process_source_file(file_path: str, remove_backup: bool = False) -> None:
     """
     Process a source file by removing extraneous spaces and backing up the original.
 
+    The file is cleaned as raw bytes, so its encoding and line endings
+    are preserved exactly.
+
     Args:
         file_path: String path to the source file to process
         remove_backup: If True, remove backup file after successful operation
@@ -69,7 +114,6 @@ def process_source_file(file_path: str, remove_backup: bool = False) -> None:
     Raises:
         FileNotFoundError: If the specified file doesn't exist
         PermissionError: If unable to read/write files
-        UnicodeDecodeError: If file contains invalid text encoding
     """
     source_path = Path(file_path)
 
@@ -79,34 +123,26 @@ def process_source_file(file_path: str, remove_backup: bool = False) -> None:
     if not source_path.is_file():
         raise ValueError(f"Path is not a file: {file_path}")
 
-    # Read the original file
-    try:
-        with open(source_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-    except UnicodeDecodeError:
-        # Try with different encoding if UTF-8 fails
-        with open(source_path, 'r', encoding='latin-1') as file:
-            lines = file.readlines()
-
-    # Clean the lines
-    cleaned_lines = clean_spaces_from_lines(lines)
+    # Remove trailing spaces and tabs from every line in one pass
+    if source_path.stat().st_size > _MMAP_THRESHOLD:
+        # Scan the page cache directly rather than copying the file into memory
+        with open(source_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            cleaned = _TRAIL_RE.sub(b'', mapped)
+    else:
+        cleaned = _TRAIL_RE.sub(b'', source_path.read_bytes())
 
-    # Backup original file to /tmp
-    backup_path = backup_file_to_tmp(source_path)
-    print(f"Original file backed up to: {backup_path}")
+    # Backup original file to /tmp unless it would be removed anyway
+    backup_path = None
+    if not remove_backup:
+        backup_path = backup_file_to_tmp(source_path)
+        print(f"Original file backed up to: {backup_path}")
 
-    # Write cleaned content to the original location
-    with open(source_path, 'w', encoding='utf-8') as file:
-        for line in cleaned_lines:
-            file.write(line + '\n')
+    # Swap the cleaned content into the original location
+    write_file_atomically(source_path, cleaned)
 
     print(f"Cleaned file saved: {source_path}")
 
-    # Remove backup file if requested and operation was successful
-    if remove_backup:
-        backup_path.unlink()
-        print(f"Backup file removed: {backup_path}")
-    else:
+    if backup_path is not None:
         print(f"Backup file retained: {backup_path}")
 
 
@@ -135,7 +171,7 @@ def main() -> None:
     try:
         process_source_file(args.file, args.remove)
         print("File processing completed successfully.")
-    except (FileNotFoundError, PermissionError, ValueError, UnicodeDecodeError) as e:
+    except (FileNotFoundError, PermissionError, ValueError) as e:
         print(f"Error: {e}")
         exit(1)
     except Exception as e: